@@ -4,18 +4,30 @@
 
 from __future__ import print_function
 import argparse
+import binascii
 import bz2
+import collections
 import gzip
 import hashlib
+import io
 import logging
 import lzma
+import mmap
+import operator
 import os
+import struct
 import sys
 
-import construct
-
 import hexdump
 
+try:
+  from concurrent import futures
+except ImportError:
+  futures = None
+
+
+_sha256 = hashlib.sha256
+
 
 class DataRange(object):
   """Class that implements an in-file data range file-like object."""
@@ -87,7 +99,7 @@ class DataRange(object):
               self._current_offset))
 
     if self._current_offset >= self._range_size:
-      return ''
+      return b''
 
     if size is None:
       size = self._range_size
@@ -150,14 +162,22 @@ class DataRange(object):
 class CPIOArchiveFileEntry(object):
   """Class that contains a CPIO archive file entry."""
 
-  def __init__(self, file_object):
+  def __init__(self, file_object, file_data=None, use_pread=False):
     """Initializes the CPIO archive file entry object.
 
     Args:
       file_object: the file-like object of the CPIO archive file.
+      file_data: optional memory-mapped data of the CPIO archive file
+                 (instance of mmap.mmap), which is used instead of
+                 the file-like object to read the data.
+      use_pread: optional boolean value to indicate the data should be read
+                 with os.pread on the file descriptor of the file-like
+                 object, instead of with seek and read.
     """
     super(CPIOArchiveFileEntry, self).__init__()
     self._current_offset = 0
+    self._file_data = file_data
+    self._use_pread = use_pread
     self._file_object = file_object
 
     self.data_offset = None
@@ -190,12 +210,17 @@ class CPIOArchiveFileEntry(object):
       return b''
 
     read_size = self.data_size - self._current_offset
-    if read_size > size:
+    if size is not None and read_size > size:
       read_size = size
 
     file_offset = self.data_offset + self._current_offset
-    self._file_object.seek(file_offset, os.SEEK_SET)
-    data = self._file_object.read(read_size)
+    if self._file_data is not None:
+      data = self._file_data[file_offset:file_offset + read_size]
+    elif self._use_pread:
+      data = os.pread(self._file_object.fileno(), read_size, file_offset)
+    else:
+      self._file_object.seek(file_offset, os.SEEK_SET)
+      data = self._file_object.read(read_size)
     self._current_offset += len(data)
     return data
 
@@ -236,6 +261,14 @@ class CPIOArchiveFileEntry(object):
     return self.data_size
 
 
+# The file entry values that are stored per file entry. A CPIO archive file
+# entry object is only created when the file entry is retrieved.
+_CPIOArchiveFileEntryValues = collections.namedtuple(
+    u'_CPIOArchiveFileEntryValues', [
+        u'data_offset', u'data_size', u'group_identifier', u'inode_number',
+        u'mode', u'modification_time', u'path', u'size', u'user_identifier'])
+
+
 class CPIOArchiveFile(object):
   """Class that contains a CPIO archive file.
 
@@ -249,68 +282,31 @@ class CPIOArchiveFile(object):
   _CPIO_SIGNATURE_NEW_ASCII = b'070701'
   _CPIO_SIGNATURE_NEW_ASCII_WITH_CHECKSUM = b'070702'
 
-  _CPIO_BINARY_BIG_ENDIAN_FILE_ENTRY_STRUCT = construct.Struct(
-      u'cpio_binary_big_endian_file_entry',
-      construct.UBInt16(u'signature'),
-      construct.UBInt16(u'device_number'),
-      construct.UBInt16(u'inode_number'),
-      construct.UBInt16(u'mode'),
-      construct.UBInt16(u'user_identifier'),
-      construct.UBInt16(u'group_identifier'),
-      construct.UBInt16(u'number_of_links'),
-      construct.UBInt16(u'special_device_number'),
-      construct.UBInt16(u'modification_time_upper'),
-      construct.UBInt16(u'modification_time_lower'),
-      construct.UBInt16(u'path_string_size'),
-      construct.UBInt16(u'file_size_upper'),
-      construct.UBInt16(u'file_size_lower'))
-
-  _CPIO_BINARY_LITTLE_ENDIAN_FILE_ENTRY_STRUCT = construct.Struct(
-      u'cpio_binary_little_endian_file_entry',
-      construct.ULInt16(u'signature'),
-      construct.ULInt16(u'device_number'),
-      construct.ULInt16(u'inode_number'),
-      construct.ULInt16(u'mode'),
-      construct.ULInt16(u'user_identifier'),
-      construct.ULInt16(u'group_identifier'),
-      construct.ULInt16(u'number_of_links'),
-      construct.ULInt16(u'special_device_number'),
-      construct.ULInt16(u'modification_time_upper'),
-      construct.ULInt16(u'modification_time_lower'),
-      construct.ULInt16(u'path_string_size'),
-      construct.ULInt16(u'file_size_upper'),
-      construct.ULInt16(u'file_size_lower'))
-
-  _CPIO_PORTABLE_ASCII_FILE_ENTRY_STRUCT = construct.Struct(
-      u'cpio_portable_ascii_file_entry',
-      construct.Bytes(u'signature', 6),
-      construct.Bytes(u'device_number', 6),
-      construct.Bytes(u'inode_number', 6),
-      construct.Bytes(u'mode', 6),
-      construct.Bytes(u'user_identifier', 6),
-      construct.Bytes(u'group_identifier', 6),
-      construct.Bytes(u'number_of_links', 6),
-      construct.Bytes(u'special_device_number', 6),
-      construct.Bytes(u'modification_time', 11),
-      construct.Bytes(u'path_string_size', 6),
-      construct.Bytes(u'file_size', 11))
-
-  _CPIO_NEW_ASCII_FILE_ENTRY_STRUCT = construct.Struct(
-      u'cpio_portable_ascii_file_entry',
-      construct.Bytes(u'signature', 6),
-      construct.Bytes(u'inode_number', 8),
-      construct.Bytes(u'mode', 8),
-      construct.Bytes(u'user_identifier', 8),
-      construct.Bytes(u'group_identifier', 8),
-      construct.Bytes(u'number_of_links', 8),
-      construct.Bytes(u'modification_time', 8),
-      construct.Bytes(u'file_size', 8),
-      construct.Bytes(u'device_major_number', 8),
-      construct.Bytes(u'device_minor_number', 8),
-      construct.Bytes(u'special_device_major_number', 8),
-      construct.Bytes(u'special_device_minor_number', 8),
-      construct.Bytes(u'path_string_size', 8),
-      construct.Bytes(u'checksum', 8))
+  _CPIO_TRAILER_PATH_STRING = u'TRAILER!!!'
+  _CPIO_TRAILER_PATH_STRING_DATA = b'TRAILER!!!\x00'
+
+  # The binary file entry consists of 13 16-bit values: signature,
+  # device number, inode number, mode, user identifier, group identifier,
+  # number of links, special device number, modification time upper and
+  # lower 16-bits, path string size and file size upper and lower 16-bits.
+  _CPIO_BINARY_BIG_ENDIAN_FILE_ENTRY_STRUCT = struct.Struct('>13H')
+
+  _CPIO_BINARY_LITTLE_ENDIAN_FILE_ENTRY_STRUCT = struct.Struct('<13H')
+
+  # The ASCII file entries consist of fixed-size octal (portable ASCII) or
+  # hexadecimal (new ASCII) strings, which are read from fixed offsets.
+  _CPIO_PORTABLE_ASCII_FILE_ENTRY_SIZE = 76
+
+  _CPIO_NEW_ASCII_FILE_ENTRY_SIZE = 110
+
+  # The 13 hexadecimal strings of the new ASCII file entry, that follow
+  # the signature, are decoded at once into 32-bit values: inode number,
+  # mode, user identifier, group identifier, number of links, modification
+  # time, file size, device major and minor number, special device major
+  # and minor number, path string size and checksum.
+  _CPIO_NEW_ASCII_FILE_ENTRY_VALUES_STRUCT = struct.Struct('>13I')
+
+  _READ_BUFFER_SIZE = 64 * 1024
 
   def __init__(self, debug=False):
     """Initializes the CPIO archive file object.
@@ -321,227 +317,372 @@ class CPIOArchiveFile(object):
     """
     super(CPIOArchiveFile, self).__init__()
     self._debug = debug
+    self._file_data = None
+    self._file_data_alignment_mask = 0
     self._file_entries = None
+    self._file_entry_struct = None
+    self._file_entry_struct_size = 0
     self._file_object = None
     self._file_object_opened_in_object = False
     self._file_size = 0
+    self._parse_file_entry = None
+    self._path_string_alignment_mask = 0
+    self._read_buffer = b''
+    self._read_buffer_offset = 0
+    self._use_pread = False
 
     self.file_format = None
     self.size = None
 
-  def _ReadFileEntry(self, file_offset):
-    """Reads a file entry.
+  def _DebugPrintFileEntry(self, file_offset, file_entry_data, file_entry):
+    """Prints file entry debug information.
 
     Args:
-      file_offset: an integer containing the current file offset.
-
-    Raises:
-      IOError: if the file entry cannot be read.
+      file_offset: an integer containing the offset of the file entry.
+      file_entry_data: a binary string containing the file entry data.
+      file_entry: the file entry values (instance of
+                  _CPIOArchiveFileEntryValues).
     """
-    if self._debug:
-      print(u'Seeking file entry at offset: 0x{0:08x}'.format(file_offset))
+    self._DebugPrintFileEntryData(file_offset, file_entry_data)
 
-    self._file_object.seek(file_offset, os.SEEK_SET)
+    if self.file_format in (u'bin-big-endian', u'bin-little-endian'):
+      (signature, device_number, _, _, _, _, number_of_links,
+       special_device_number, _, _, path_string_size, _,
+       _) = self._file_entry_struct.unpack(file_entry_data)
+
+      print(u'Signature\t\t\t\t\t\t\t\t: 0x{0:04x}'.format(signature))
 
-    if self.file_format == u'bin-big-endian':
-      file_entry_struct = self._CPIO_BINARY_BIG_ENDIAN_FILE_ENTRY_STRUCT
-    elif self.file_format == u'bin-little-endian':
-      file_entry_struct = self._CPIO_BINARY_LITTLE_ENDIAN_FILE_ENTRY_STRUCT
     elif self.file_format == u'odc':
-      file_entry_struct = self._CPIO_PORTABLE_ASCII_FILE_ENTRY_STRUCT
+      device_number = int(file_entry_data[6:12], 8)
+      number_of_links = int(file_entry_data[36:42], 8)
+      special_device_number = int(file_entry_data[42:48], 8)
+      path_string_size = int(file_entry_data[59:65], 8)
+
+      print(u'Signature\t\t\t\t\t\t\t\t: {0!s}'.format(
+          file_entry_data[0:6]))
+
     elif self.file_format in (u'crc', u'newc'):
-      file_entry_struct = self._CPIO_NEW_ASCII_FILE_ENTRY_STRUCT
+      (_, _, _, _, number_of_links, _, _, device_major_number,
+       device_minor_number, special_device_major_number,
+       special_device_minor_number, path_string_size,
+       checksum) = self._UnpackNewASCIIFileEntryValues(file_entry_data)
 
-    file_entry_struct_size = file_entry_struct.sizeof()
-    file_entry_data = self._file_object.read(file_entry_struct_size)
-    file_offset += file_entry_struct_size
+      print(u'Signature\t\t\t\t\t\t\t\t: {0!s}'.format(
+          file_entry_data[0:6]))
 
-    if self._debug:
-      print(u'File entry data:')
-      print(hexdump.Hexdump(file_entry_data))
+    if self.file_format not in (u'crc', u'newc'):
+      print(u'Device number\t\t\t\t\t\t\t\t: {0:d}'.format(device_number))
 
-    try:
-      file_entry_struct = file_entry_struct.parse(file_entry_data)
-    except construct.FieldError as exception:
-      raise IOError((
-          u'Unable to parse file entry data section with error: '
-          u'{0:s}').file_format(exception))
+    print(u'Inode number\t\t\t\t\t\t\t\t: {0:d}'.format(
+        file_entry.inode_number))
+    print(u'Mode\t\t\t\t\t\t\t\t\t: {0:o}'.format(file_entry.mode))
 
-    if self.file_format in (u'bin-big-endian', u'bin-little-endian'):
-      inode_number = file_entry_struct.inode_number
-      mode = file_entry_struct.mode
-      user_identifier = file_entry_struct.user_identifier
-      group_identifier = file_entry_struct.group_identifier
+    print(u'User identifier (UID)\t\t\t\t\t\t\t: {0:d}'.format(
+        file_entry.user_identifier))
 
-      modification_time = (
-          (file_entry_struct.modification_time_upper << 16) |
-          file_entry_struct.modification_time_lower)
+    print(u'Group identifier (GID)\t\t\t\t\t\t\t: {0:d}'.format(
+        file_entry.group_identifier))
 
-      path_string_size = file_entry_struct.path_string_size
+    print(u'Number of links\t\t\t\t\t\t\t\t: {0:d}'.format(number_of_links))
 
-      file_size = (
-          (file_entry_struct.file_size_upper << 16) |
-          file_entry_struct.file_size_lower)
+    if self.file_format not in (u'crc', u'newc'):
+      print(u'Special device number\t\t\t\t\t\t\t\t: {0:d}'.format(
+          special_device_number))
 
-    elif self.file_format == u'odc':
-      inode_number = int(file_entry_struct.inode_number, 8)
-      mode = int(file_entry_struct.mode, 8)
-      user_identifier = int(file_entry_struct.user_identifier, 8)
-      group_identifier = int(file_entry_struct.group_identifier, 8)
-      modification_time = int(file_entry_struct.modification_time, 8)
-      path_string_size = int(file_entry_struct.path_string_size, 8)
-      file_size = int(file_entry_struct.file_size, 8)
+    print(u'Modification time\t\t\t\t\t\t\t: {0:d}'.format(
+        file_entry.modification_time))
 
-    elif self.file_format in (u'crc', u'newc'):
-      inode_number = int(file_entry_struct.inode_number, 16)
-      mode = int(file_entry_struct.mode, 16)
-      user_identifier = int(file_entry_struct.user_identifier, 16)
-      group_identifier = int(file_entry_struct.group_identifier, 16)
-      modification_time = int(file_entry_struct.modification_time, 16)
-      path_string_size = int(file_entry_struct.path_string_size, 16)
-      file_size = int(file_entry_struct.file_size, 16)
+    if self.file_format not in (u'crc', u'newc'):
+      print(u'Path string size\t\t\t\t\t\t\t: {0:d}'.format(path_string_size))
 
-    if self._debug:
-      if self.file_format in (u'bin-big-endian', u'bin-little-endian'):
-        print(u'Signature\t\t\t\t\t\t\t\t: 0x{0:04x}'.format(
-            file_entry_struct.signature))
-      else:
-        print(u'Signature\t\t\t\t\t\t\t\t: {0!s}'.format(
-            file_entry_struct.signature))
+    print(u'File size\t\t\t\t\t\t\t\t: {0:d}'.format(file_entry.data_size))
 
-      if self.file_format not in (u'crc', u'newc'):
-        if self.file_format in (u'bin-big-endian', u'bin-little-endian'):
-          device_number = file_entry_struct.device_number
-        elif self.file_format == u'odc':
-          device_number = int(file_entry_struct.device_number, 8)
+    if self.file_format in (u'crc', u'newc'):
+      print(u'Device major number\t\t\t\t\t\t\t: {0:d}'.format(
+          device_major_number))
 
-        print(u'Device number\t\t\t\t\t\t\t\t: {0:d}'.format(device_number))
+      print(u'Device minor number\t\t\t\t\t\t\t: {0:d}'.format(
+          device_minor_number))
 
-      print(u'Inode number\t\t\t\t\t\t\t\t: {0:d}'.format(inode_number))
-      print(u'Mode\t\t\t\t\t\t\t\t\t: {0:o}'.format(mode))
+      print(u'Special device major number\t\t\t\t\t\t: {0:d}'.format(
+          special_device_major_number))
 
-      print(u'User identifier (UID)\t\t\t\t\t\t\t: {0:d}'.format(
-          user_identifier))
+      print(u'Special device minor number\t\t\t\t\t\t: {0:d}'.format(
+          special_device_minor_number))
 
-      print(u'Group identifier (GID)\t\t\t\t\t\t\t: {0:d}'.format(
-          group_identifier))
+      print(u'Path string size\t\t\t\t\t\t\t: {0:d}'.format(path_string_size))
 
-      if self.file_format in (u'bin-big-endian', u'bin-little-endian'):
-        number_of_links = file_entry_struct.number_of_links
-      elif self.file_format == u'odc':
-        number_of_links = int(file_entry_struct.number_of_links, 8)
-      elif self.file_format in (u'crc', u'newc'):
-        number_of_links = int(file_entry_struct.number_of_links, 16)
+      print(u'Checksum\t\t\t\t\t\t\t\t: 0x{0:08x}'.format(checksum))
 
-      print(u'Number of links\t\t\t\t\t\t\t\t: {0:d}'.format(number_of_links))
+    print(u'Path string\t\t\t\t\t\t\t\t: {0:s}'.format(file_entry.path))
 
-      if self.file_format not in (u'crc', u'newc'):
-        if self.file_format in (u'bin-big-endian', u'bin-little-endian'):
-          special_device_number = file_entry_struct.special_device_number
-        elif self.file_format == u'odc':
-          special_device_number = int(
-              file_entry_struct.special_device_number, 8)
+    padding_offset = file_offset + len(file_entry_data) + path_string_size
+    padding_data = self._ReadData(
+        padding_offset, file_entry.data_offset - padding_offset)
 
-        print(u'Special device number\t\t\t\t\t\t\t\t: {0:d}'.format(
-            special_device_number))
+    print(u'Path string alignment padding:')
+    print(hexdump.Hexdump(padding_data))
 
-      print(u'Modification time\t\t\t\t\t\t\t: {0:d}'.format(modification_time))
+    if self.file_format in (u'crc', u'newc'):
+      padding_offset = file_entry.data_offset + file_entry.data_size
+      padding_data = self._ReadData(
+          padding_offset, file_offset + file_entry.size - padding_offset)
 
-      if self.file_format not in (u'crc', u'newc'):
-        print(u'Path string size\t\t\t\t\t\t\t: {0:d}'.format(path_string_size))
+      print(u'File data alignment padding:')
+      print(hexdump.Hexdump(padding_data))
 
-      print(u'File size\t\t\t\t\t\t\t\t: {0:d}'.format(file_size))
+    print(u'')
 
-      if self.file_format in (u'crc', u'newc'):
-        device_major_number = int(file_entry_struct.device_major_number, 16)
+  def _DebugPrintFileEntryData(self, file_offset, file_entry_data):
+    """Prints file entry data debug information.
 
-        print(u'Device major number\t\t\t\t\t\t\t: {0:d}'.format(
-            device_major_number))
+    Args:
+      file_offset: an integer containing the offset of the file entry.
+      file_entry_data: a binary string containing the file entry data.
+    """
+    print(u'Seeking file entry at offset: 0x{0:08x}'.format(file_offset))
 
-        device_minor_number = int(file_entry_struct.device_minor_number, 16)
+    print(u'File entry data:')
+    print(hexdump.Hexdump(file_entry_data))
 
-        print(u'Device minor number\t\t\t\t\t\t\t: {0:d}'.format(
-            device_minor_number))
+  def _GetFileEntry(self, file_entry_values):
+    """Retrieves a file entry.
 
-        special_device_major_number = int(
-            file_entry_struct.special_device_major_number, 16)
+    Args:
+      file_entry_values: the file entry values (instance of
+                         _CPIOArchiveFileEntryValues).
 
-        print(u'Special device major number\t\t\t\t\t\t: {0:d}'.format(
-            special_device_major_number))
+    Returns:
+      A CPIO archive file entry (instance of CPIOArchiveFileEntry).
+    """
+    file_entry = CPIOArchiveFileEntry(
+        self._file_object, file_data=self._file_data,
+        use_pread=self._use_pread)
+
+    file_entry.data_offset = file_entry_values.data_offset
+    file_entry.data_size = file_entry_values.data_size
+    file_entry.group_identifier = file_entry_values.group_identifier
+    file_entry.inode_number = file_entry_values.inode_number
+    file_entry.modification_time = file_entry_values.modification_time
+    file_entry.path = file_entry_values.path
+    file_entry.mode = file_entry_values.mode
+    file_entry.size = file_entry_values.size
+    file_entry.user_identifier = file_entry_values.user_identifier
 
-        special_device_minor_number = int(
-            file_entry_struct.special_device_minor_number, 16)
+    return file_entry
 
-        print(u'Special device minor number\t\t\t\t\t\t: {0:d}'.format(
-            special_device_minor_number))
+  def _ParseBinaryFileEntry(self, file_entry_data):
+    """Parses a binary file entry.
 
-        print(u'Path string size\t\t\t\t\t\t\t: {0:d}'.format(path_string_size))
+    Args:
+      file_entry_data: a binary string containing the file entry data.
 
-        checksum = int(file_entry_struct.checksum, 16)
+    Returns:
+      A tuple containing the inode number, mode, user identifier, group
+      identifier, modification time, path string size and file size.
+    """
+    (_, _, inode_number, mode, user_identifier, group_identifier, _, _,
+     modification_time_upper, modification_time_lower, path_string_size,
+     file_size_upper, file_size_lower) = self._file_entry_struct.unpack(
+         file_entry_data)
 
-        print(u'Checksum\t\t\t\t\t\t\t\t: 0x{0:08x}'.format(checksum))
+    modification_time = (
+        (modification_time_upper << 16) | modification_time_lower)
 
-    path_string_data = self._file_object.read(path_string_size)
-    file_offset += path_string_size
+    file_size = (file_size_upper << 16) | file_size_lower
 
-    # TODO: should this be ASCII?
-    path_string = path_string_data.decode(u'ascii')
-    path_string, _, _ = path_string.partition(u'\x00')
+    return (
+        inode_number, mode, user_identifier, group_identifier,
+        modification_time, path_string_size, file_size)
 
-    if self._debug:
-      print(u'Path string\t\t\t\t\t\t\t\t: {0:s}'.format(path_string))
+  def _ParseNewASCIIFileEntry(self, file_entry_data):
+    """Parses a new ASCII file entry.
 
-    if self.file_format in (u'bin-big-endian', u'bin-little-endian'):
-      padding_size = file_offset % 2
-      if padding_size > 0:
-        padding_size = 2 - padding_size
+    Args:
+      file_entry_data: a binary string containing the file entry data.
 
-    elif self.file_format == u'odc':
-      padding_size = 0
+    Returns:
+      A tuple containing the inode number, mode, user identifier, group
+      identifier, modification time, path string size and file size.
 
-    elif self.file_format in (u'crc', u'newc'):
-      padding_size = file_offset % 4
-      if padding_size > 0:
-        padding_size = 4 - padding_size
+    Raises:
+      ValueError: if the file entry data contains an invalid value.
+    """
+    (inode_number, mode, user_identifier, group_identifier, _,
+     modification_time, file_size, _, _, _, _, path_string_size,
+     _) = self._UnpackNewASCIIFileEntryValues(file_entry_data)
 
-    if self._debug:
-      padding_data = self._file_object.read(padding_size)
-      print(u'Path string alignment padding:')
-      print(hexdump.Hexdump(padding_data))
+    return (
+        inode_number, mode, user_identifier, group_identifier,
+        modification_time, path_string_size, file_size)
 
-    file_offset += padding_size
+  def _ParsePortableASCIIFileEntry(self, file_entry_data):
+    """Parses a portable ASCII file entry.
 
-    file_entry = CPIOArchiveFileEntry(self._file_object)
+    Args:
+      file_entry_data: a binary string containing the file entry data.
 
-    file_entry.data_offset = file_offset
-    file_entry.data_size = file_size
-    file_entry.group_identifier = group_identifier
-    file_entry.inode_number = inode_number
-    file_entry.modification_time = modification_time
-    file_entry.path = path_string
-    file_entry.mode = mode
-    file_entry.size = (
-        file_entry_struct_size + path_string_size + padding_size + file_size)
-    file_entry.user_identifier = user_identifier
+    Returns:
+      A tuple containing the inode number, mode, user identifier, group
+      identifier, modification time, path string size and file size.
 
-    if self.file_format in (u'crc', u'newc'):
-      file_offset += file_size
+    Raises:
+      ValueError: if the file entry data contains an invalid value.
+    """
+    values_data = file_entry_data[6:]
+
+    # Values that are not strictly octal digits, such as space padded
+    # values, are decoded per value. int() also accepts "_" between digits,
+    # which would shift the bit positions of the values when decoded at once.
+    if values_data.translate(None, b'01234567'):
+      return (
+          int(file_entry_data[12:18], 8),
+          int(file_entry_data[18:24], 8),
+          int(file_entry_data[24:30], 8),
+          int(file_entry_data[30:36], 8),
+          int(file_entry_data[48:59], 8),
+          int(file_entry_data[59:65], 8),
+          int(file_entry_data[65:76], 8))
+
+    # The octal strings are decoded at once, where every octal digit
+    # represents 3 bits. The 6 digit values are 18-bit values and the
+    # 11 digit values are 33-bit values.
+    values = int(values_data, 8)
+
+    return (
+        (values >> 174) & 0x3ffff,
+        (values >> 156) & 0x3ffff,
+        (values >> 138) & 0x3ffff,
+        (values >> 120) & 0x3ffff,
+        (values >> 51) & 0x1ffffffff,
+        (values >> 33) & 0x3ffff,
+        values & 0x1ffffffff)
+
+  def _ReadData(self, file_offset, size):
+    """Reads data.
+
+    If the archive file is not memory-mapped, the data is read from a read
+    buffer, which is refilled when the data is not in the buffer. This
+    reduces the number of seek and read calls for small file entries.
+
+    Seeking backwards in a decompressed stream restarts decompression from
+    the start of the stream. Hence, unless os.pread is used, the unread
+    remainder of the read buffer is kept and the data that follows the read
+    buffer is read, instead of seeking back to the start of the data.
 
-      padding_size = file_offset % 4
-      if padding_size > 0:
-        padding_size = 4 - padding_size
+    Args:
+      file_offset: an integer containing the offset of the data.
+      size: an integer containing the size of the data.
 
-      if self._debug:
+    Returns:
+      A binary string containing the data.
+    """
+    if self._file_data is not None:
+      return self._file_data[file_offset:file_offset + size]
+
+    buffer_offset = file_offset - self._read_buffer_offset
+    if (buffer_offset < 0 or
+        buffer_offset + size > len(self._read_buffer)):
+      read_size = max(size, self._READ_BUFFER_SIZE)
+      buffer_end_offset = self._read_buffer_offset + len(self._read_buffer)
+
+      if self._use_pread:
+        self._read_buffer = os.pread(
+            self._file_object.fileno(), read_size, file_offset)
+
+      elif 0 <= buffer_offset and file_offset < buffer_end_offset:
+        self._file_object.seek(buffer_end_offset, os.SEEK_SET)
+        self._read_buffer = b''.join([
+            self._read_buffer[buffer_offset:],
+            self._file_object.read(read_size)])
+
+      else:
         self._file_object.seek(file_offset, os.SEEK_SET)
-        padding_data = self._file_object.read(padding_size)
+        self._read_buffer = self._file_object.read(read_size)
+
+      self._read_buffer_offset = file_offset
+      buffer_offset = 0
+
+    return self._read_buffer[buffer_offset:buffer_offset + size]
+
+  def _ReadFileEntry(self, file_offset):
+    """Reads a file entry.
+
+    Args:
+      file_offset: an integer containing the current file offset.
+
+    Returns:
+      The file entry values (instance of _CPIOArchiveFileEntryValues).
+
+    Raises:
+      IOError: if the file entry cannot be read.
+    """
+    file_entry_offset = file_offset
+
+    file_entry_struct_size = self._file_entry_struct_size
+    if self._file_data is not None:
+      file_entry_data = self._file_data[
+          file_offset:file_offset + file_entry_struct_size]
+    else:
+      file_entry_data = self._ReadData(file_offset, file_entry_struct_size)
+    file_offset += file_entry_struct_size
 
-        print(u'File data alignment padding:')
-        print(hexdump.Hexdump(padding_data))
+    try:
+      if len(file_entry_data) != file_entry_struct_size:
+        raise ValueError(u'file entry data too small')
 
-      file_entry.size += padding_size
+      (inode_number, mode, user_identifier, group_identifier,
+       modification_time, path_string_size,
+       file_size) = self._parse_file_entry(file_entry_data)
+
+    except ValueError as exception:
+      if self._debug:
+        self._DebugPrintFileEntryData(file_entry_offset, file_entry_data)
+
+      raise IOError((
+          u'Unable to parse file entry data section with error: '
+          u'{0!s}').format(exception))
+
+    if self._file_data is not None:
+      path_string_data = self._file_data[
+          file_offset:file_offset + path_string_size]
+    else:
+      path_string_data = self._ReadData(file_offset, path_string_size)
+    file_offset += path_string_size
+
+    # The trailer file entry marks the end of the archive. Its path string
+    # data is compared before decoding.
+    if path_string_data.startswith(self._CPIO_TRAILER_PATH_STRING_DATA):
+      path_string = self._CPIO_TRAILER_PATH_STRING
+
+    else:
+      # Only the path string data before the end-of-string character is
+      # decoded.
+      string_size = path_string_data.find(b'\x00')
+      if string_size >= 0:
+        path_string_data = path_string_data[:string_size]
+
+      # TODO: should this be ASCII?
+      path_string = path_string_data.decode(u'ascii')
+
+    padding_size = -file_offset & self._path_string_alignment_mask
+
+    file_offset += padding_size
+    data_offset = file_offset
+
+    file_offset += file_size
+
+    padding_size = -file_offset & self._file_data_alignment_mask
+
+    file_offset += padding_size
+
+    file_entry = _CPIOArchiveFileEntryValues(
+        data_offset, file_size, group_identifier, inode_number, mode,
+        modification_time, path_string, file_offset - file_entry_offset,
+        user_identifier)
 
     if self._debug:
-      print(u'')
+      self._DebugPrintFileEntry(file_entry_offset, file_entry_data, file_entry)
 
     return file_entry
 
@@ -551,16 +692,76 @@ class CPIOArchiveFile(object):
     while file_offset < self._file_size or self._file_size == 0:
       file_entry = self._ReadFileEntry(file_offset)
       file_offset += file_entry.size
-      if file_entry.path == u'TRAILER!!!':
+      if file_entry.path == self._CPIO_TRAILER_PATH_STRING:
         break
 
-      if file_entry.path in self._file_entries:
-        continue
-
-      self._file_entries[file_entry.path] = file_entry
+      # Only the first file entry of a path is stored. setdefault looks up
+      # the path once, where a membership test and store would do so twice.
+      self._file_entries.setdefault(file_entry.path, file_entry)
 
     self.size = file_offset
 
+  def _SpecializeFormat(self):
+    """Determines the format specific file entry parsing.
+
+    The file entry parsing only depends on the format, hence it is determined
+    once instead of for every file entry.
+
+    The alignments are powers of 2 and are stored as masks, so that the
+    alignment padding size of an offset can be determined as:
+    -offset & mask.
+    """
+    self._file_data_alignment_mask = 0
+    self._file_entry_struct = None
+    self._path_string_alignment_mask = 0
+
+    if self.file_format == u'bin-big-endian':
+      self._file_entry_struct = self._CPIO_BINARY_BIG_ENDIAN_FILE_ENTRY_STRUCT
+      self._file_entry_struct_size = self._file_entry_struct.size
+      self._parse_file_entry = self._ParseBinaryFileEntry
+      self._path_string_alignment_mask = 1
+
+    elif self.file_format == u'bin-little-endian':
+      self._file_entry_struct = (
+          self._CPIO_BINARY_LITTLE_ENDIAN_FILE_ENTRY_STRUCT)
+      self._file_entry_struct_size = self._file_entry_struct.size
+      self._parse_file_entry = self._ParseBinaryFileEntry
+      self._path_string_alignment_mask = 1
+
+    elif self.file_format == u'odc':
+      self._file_entry_struct_size = self._CPIO_PORTABLE_ASCII_FILE_ENTRY_SIZE
+      self._parse_file_entry = self._ParsePortableASCIIFileEntry
+
+    elif self.file_format in (u'crc', u'newc'):
+      self._file_entry_struct_size = self._CPIO_NEW_ASCII_FILE_ENTRY_SIZE
+      self._parse_file_entry = self._ParseNewASCIIFileEntry
+      self._file_data_alignment_mask = 3
+      self._path_string_alignment_mask = 3
+
+  def _UnpackNewASCIIFileEntryValues(self, file_entry_data):
+    """Unpacks the values of a new ASCII file entry.
+
+    Args:
+      file_entry_data: a binary string containing the file entry data.
+
+    Returns:
+      A tuple containing the 13 values of the file entry.
+
+    Raises:
+      ValueError: if the file entry data contains an invalid value.
+    """
+    values_data = file_entry_data[6:]
+
+    # Values that are not strictly hexadecimal digits, such as space padded
+    # values, are decoded per value, since unhexlify does not accept them.
+    if values_data.translate(None, b'0123456789abcdefABCDEF'):
+      return tuple(
+          int(values_data[value_offset:value_offset + 8], 16)
+          for value_offset in range(0, 104, 8))
+
+    return self._CPIO_NEW_ASCII_FILE_ENTRY_VALUES_STRUCT.unpack(
+        binascii.unhexlify(values_data))
+
   def Close(self):
     """Closes the CPIO archive file."""
     if not self._file_object:
@@ -569,8 +770,12 @@ class CPIOArchiveFile(object):
     if self._file_object_opened_in_object:
       self._file_object.close()
       self._file_object_opened_in_object = False
+    self._file_data = None
     self._file_entries = None
     self._file_object = None
+    self._read_buffer = b''
+    self._read_buffer_offset = 0
+    self._use_pread = False
 
   def FileEntryExistsByPath(self, path):
     """Determines if file entry for a specific path exists.
@@ -595,9 +800,9 @@ class CPIOArchiveFile(object):
     Yields:
       A CPIO archive file entry (instance of CPIOArchiveFileEntry).
     """
-    for path, file_entry in iter(self._file_entries.items()):
+    for path, file_entry_values in iter(self._file_entries.items()):
       if path.startswith(path_prefix):
-        yield file_entry
+        yield self._GetFileEntry(file_entry_values)
 
   def GetFileEntryByPath(self, path):
     """Retrieves a file entry for a specific path.
@@ -611,7 +816,11 @@ class CPIOArchiveFile(object):
     if self._file_entries is None:
       return
 
-    return self._file_entries.get(path, None)
+    file_entry_values = self._file_entries.get(path, None)
+    if file_entry_values is None:
+      return
+
+    return self._GetFileEntry(file_entry_values)
 
   def Open(self, filename):
     """Opens the CPIO archive file.
@@ -626,16 +835,34 @@ class CPIOArchiveFile(object):
 
     file_object = open(filename, 'rb')
 
-    self.OpenFileObject(file_object)
+    # Map the file into memory so that the file entries can be read without
+    # a seek and read per file entry. Note that an empty file cannot be
+    # mapped. If the file cannot be mapped, for example a special file or
+    # a file on a file system that does not support mapping, the file object
+    # is read instead.
+    if stat_object.st_size > 0:
+      try:
+        mapped_file_object = mmap.mmap(
+            file_object.fileno(), 0, access=mmap.ACCESS_READ)
+      except (mmap.error, OSError, ValueError):
+        mapped_file_object = None
+
+      if mapped_file_object is not None:
+        file_object.close()
+        file_object = mapped_file_object
 
     self._file_size = stat_object.st_size
+
+    self.OpenFileObject(file_object)
+
     self._file_object_opened_in_object = True
 
   def OpenFileObject(self, file_object):
     """Opens the CPIO archive file.
 
     Args:
-      file_object: a file-like object.
+      file_object: a file-like object or memory-mapped data (instance of
+                   mmap.mmap).
 
     Raises:
       IOError: if the file is alread opened or the format signature is
@@ -663,8 +890,31 @@ class CPIOArchiveFile(object):
     if self.file_format is None:
       raise IOError(u'Unsupported CPIO format.')
 
+    self._SpecializeFormat()
+
+    if isinstance(file_object, mmap.mmap):
+      self._file_data = file_object
+
+    # Data of a regular file object is read with os.pread, which does not
+    # change the offset of the file object. Other file-like objects, such
+    # as decompressed streams, are read using seek and read. The file
+    # descriptor is retrieved from the file object on every read, so that
+    # reading from a closed file object fails instead of reading from
+    # a file that reused the file descriptor.
+    elif (hasattr(os, u'pread') and
+          isinstance(file_object, (io.BufferedReader, io.FileIO))):
+      try:
+        file_object.fileno()
+        self._use_pread = True
+      except (IOError, OSError, ValueError):
+        self._use_pread = False
+
     self._file_entries = {}
     self._file_object = file_object
+    # The signature data is the start of the read buffer, which leaves the
+    # file-like object at the end of the read buffer.
+    self._read_buffer = signature_data
+    self._read_buffer_offset = 0
 
     self._ReadFileEntries()
 
@@ -683,6 +933,12 @@ class CPIOArchiveFileHasher(object):
   _GZIP_SIGNATURE = b'\x1f\x8b'
   _XZ_SIGNATURE = b'\xfd7zXZ\x00'
 
+  _READ_BUFFER_SIZE = 1024 * 1024
+
+  # Smaller file entry data is hashed in the calling thread, since the cost
+  # of handing it off to a worker thread exceeds the cost of hashing it.
+  _THREADED_HASH_MINIMUM_SIZE = 256 * 1024
+
   def __init__(self, path, debug=False):
     """Initializes the CPIO archive file hasher object.
 
@@ -703,17 +959,146 @@ class CPIOArchiveFileHasher(object):
     """
     stat_object = os.stat(self._path)
 
-    file_object = open(self._path, 'rb')
+    file_size = stat_object.st_size
+
+    # Note that an empty file cannot be mapped.
+    if file_size == 0:
+      return
+
+    with open(self._path, 'rb') as file_object:
+      # If the file cannot be mapped, for example a special file or a file
+      # on a file system that does not support mapping, the file object is
+      # read instead.
+      try:
+        file_data = mmap.mmap(
+            file_object.fileno(), 0, access=mmap.ACCESS_READ)
+      except (mmap.error, OSError, ValueError):
+        file_data = None
+
+      if file_data is None:
+        self._HashFileEntries(file_object, None, file_size, output_writer)
+        return
+
+    # The uncompressed file entry data is hashed directly from the mapped
+    # data, without intermediate copies. Note that on Python 2 a memory view
+    # of mapped data is not supported.
+    try:
+      file_view = memoryview(file_data)
+    except TypeError:
+      file_view = None
+
+    try:
+      self._HashFileEntries(file_data, file_view, file_size, output_writer)
+
+    finally:
+      if file_view is not None:
+        file_view.release()
+      file_data.close()
 
+  def _CalculateSHA256Hash(self, data):
+    """Calculates a SHA-256 hash.
+
+    Args:
+      data: a binary string or memory view containing the data.
+
+    Returns:
+      A string containing the hexadecimal representation of the hash.
+    """
+    return _sha256(data).hexdigest()
+
+  def _HashMappedFileEntries(self, file_view, file_entries):
+    """Hashes file entries directly from the memory-mapped data.
+
+    hashlib releases the GIL while hashing larger data, hence larger file
+    entry data is hashed by a pool of worker threads.
+
+    Args:
+      file_view: a memory view of the memory-mapped data.
+      file_entries: a list of CPIO archive file entries (instances of
+                    CPIOArchiveFileEntry) that contain data.
+
+    Returns:
+      A list of tuples containing the path and SHA-256 hash of the file
+      entries.
+    """
+    hashes = []
+    threaded_hashes = []
+
+    # Note that on Python 2 concurrent.futures and os.cpu_count are not
+    # available, in which case all file entry data is hashed serially.
+    number_of_workers = getattr(os, u'cpu_count', lambda: 1)() or 1
+    if futures is None or number_of_workers == 1:
+      for file_entry in file_entries:
+        data_end_offset = file_entry.data_offset + file_entry.data_size
+        data = file_view[file_entry.data_offset:data_end_offset]
+
+        hash_value = _sha256(data).hexdigest()
+        hashes.append((file_entry.path, hash_value))
+
+      return hashes
+
+    with futures.ThreadPoolExecutor(
+        max_workers=number_of_workers) as executor:
+      for file_entry in file_entries:
+        data_end_offset = file_entry.data_offset + file_entry.data_size
+        data = file_view[file_entry.data_offset:data_end_offset]
+
+        if file_entry.data_size < self._THREADED_HASH_MINIMUM_SIZE:
+          hash_value = _sha256(data).hexdigest()
+          hashes.append((file_entry.path, hash_value))
+
+        else:
+          future = executor.submit(self._CalculateSHA256Hash, data)
+          threaded_hashes.append((file_entry.path, future))
+
+    for path, future in threaded_hashes:
+      hashes.append((path, future.result()))
+
+    return hashes
+
+  def _HashStreamedFileEntries(self, file_entries):
+    """Hashes file entries by reading their data.
+
+    Args:
+      file_entries: a list of CPIO archive file entries (instances of
+                    CPIOArchiveFileEntry) that contain data, sorted by data
+                    offset.
+
+    Returns:
+      A list of tuples containing the path and SHA-256 hash of the file
+      entries.
+    """
+    hashes = []
+    for file_entry in file_entries:
+      sha256_context = _sha256()
+      data = file_entry.read(self._READ_BUFFER_SIZE)
+      while data:
+        sha256_context.update(data)
+        data = file_entry.read(self._READ_BUFFER_SIZE)
+
+      hashes.append((file_entry.path, sha256_context.hexdigest()))
+
+    return hashes
+
+  def _HashFileEntries(self, file_data, file_view, file_size, output_writer):
+    """Hashes the file entries stored in the archive file.
+
+    Args:
+      file_data: the memory-mapped data of the archive file (instance of
+                 mmap.mmap) or a file-like object of the archive file.
+      file_view: a memory view of the memory-mapped data or None if not
+                 available.
+      file_size: an integer containing the size of the archive file.
+      output_writer: an output writer object.
+    """
     file_offset = 0
-    file_size = stat_object.st_size
 
     # initrd files can consist of an uncompressed and compressed cpio archive.
     # Keeping the functionality in this script for now, but this likely
     # needs to be in a separate initrd hashing script.
-    while file_offset < stat_object.st_size:
-      file_object.seek(file_offset, os.SEEK_SET)
-      signature_data = file_object.read(6)
+    while file_offset < file_size:
+      file_data.seek(file_offset, os.SEEK_SET)
+      signature_data = file_data.read(6)
 
       file_type = None
       if len(signature_data) > 2:
@@ -738,10 +1123,10 @@ class CPIOArchiveFileHasher(object):
         return
 
       if file_type == u'cpio':
-        file_object.seek(file_offset, os.SEEK_SET)
-        cpio_file_object = file_object
+        file_data.seek(file_offset, os.SEEK_SET)
+        cpio_file_object = file_data
       elif file_type in (u'bzip', u'gzip', u'xz'):
-        compressed_data_file_object = DataRange(file_object)
+        compressed_data_file_object = DataRange(file_data)
         compressed_data_file_object.SetRange(
             file_offset, file_size - file_offset)
 
@@ -755,18 +1140,23 @@ class CPIOArchiveFileHasher(object):
       cpio_archive_file = CPIOArchiveFile(debug=self._debug)
       cpio_archive_file.OpenFileObject(cpio_file_object)
 
-      for file_entry in sorted(cpio_archive_file.GetFileEntries()):
-        if file_entry.data_size == 0:
-          continue
-
-        sha256_context = hashlib.sha256()
-        file_data = file_entry.read(4096)
-        while file_data:
-          sha256_context.update(file_data)
-          file_data = file_entry.read(4096)
+      # The decompressed data can only be read efficiently in sequential
+      # order, since seeking backwards in a compressed stream restarts
+      # decompression from the start. Hence the file entries are hashed in
+      # order of their data offset and the results are written sorted by
+      # path afterwards. File entries without data are not hashed.
+      file_entries = [
+          file_entry for file_entry in cpio_archive_file.GetFileEntries()
+          if file_entry.data_size > 0]
+      file_entries.sort(key=operator.attrgetter(u'data_offset'))
+
+      if file_type == u'cpio' and file_view is not None:
+        hashes = self._HashMappedFileEntries(file_view, file_entries)
+      else:
+        hashes = self._HashStreamedFileEntries(file_entries)
 
-        output_writer.WriteText(u'{0:s}\t{1:s}'.format(
-            sha256_context.hexdigest(), file_entry.path))
+      for path, hash_value in sorted(hashes):
+        output_writer.WriteText(u'{0:s}\t{1:s}'.format(hash_value, path))
 
       file_offset += cpio_archive_file.size
 